@@ -4,13 +4,43 @@ Simple webhook server to receive and display Grafana alerts.
 This demonstrates how to integrate external alerting systems.
 """
 
-from http.server import HTTPServer, BaseHTTPRequestHandler
-import json
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import datetime
+import os
+import signal
+import socket
+import sys
 import threading
 import time
+import traceback
+
+# orjson is much faster than the stdlib parser; fall back to json if it isn't installed
+try:
+    import orjson
+
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    import json
+
+    json_loads = json.loads
+
+    def json_dumps(obj):
+        return json.dumps(obj).encode("utf-8")
+
+WEBHOOK_ADDRESS = ('localhost', 8080)
+
+class ReusePortHTTPServer(ThreadingHTTPServer):
+    """Threading HTTP server that lets several processes bind the same port"""
+
+    def server_bind(self):
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
 
 class AlertHandler(BaseHTTPRequestHandler):
+    # Keep connections open so Grafana can reuse them for consecutive alerts
+    protocol_version = "HTTP/1.1"
+
     def do_POST(self):
         """Handle incoming webhook alerts from Grafana"""
         if self.path == '/alerts':
@@ -18,30 +48,36 @@ class AlertHandler(BaseHTTPRequestHandler):
             post_data = self.rfile.read(content_length)
             
             try:
-                alert_data = json.loads(post_data.decode('utf-8'))
+                alert_data = json_loads(post_data)
                 self.process_alert(alert_data)
                 
                 # Send success response
                 self.send_response(200)
+                body = b'{"status": "received"}'
                 self.send_header('Content-type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
                 self.end_headers()
-                self.wfile.write(b'{"status": "received"}')
+                self.wfile.write(body)
                 
             except Exception as e:
                 self.send_response(400)
+                self.send_header('Content-Length', '0')
                 self.end_headers()
                 print(f"Error processing alert: {e}")
         else:
+            # The request body was not read, so the connection can't be reused;
+            # the Connection: close header also sets close_connection
             self.send_response(404)
+            self.send_header('Connection', 'close')
+            self.send_header('Content-Length', '0')
             self.end_headers()
     
     def process_alert(self, alert_data):
         """Process and display the alert"""
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        print("\n" + "="*60)
-        print(f"🚨 ALERT RECEIVED at {timestamp}")
-        print("="*60)
+        # Build the whole block first so concurrent alerts don't interleave on the console
+        lines = ["\n" + "="*60, f"🚨 ALERT RECEIVED at {timestamp}", "="*60]
         
         # Extract key information
         if 'alerts' in alert_data:
@@ -58,35 +94,106 @@ class AlertHandler(BaseHTTPRequestHandler):
                     'info': '🔵'
                 }.get(severity, '⚪')
                 
-                print(f"{severity_emoji} {status.upper()}: {title}")
-                print(f"   Severity: {severity}")
+                lines.append(f"{severity_emoji} {status.upper()}: {title}")
+                lines.append(f"   Severity: {severity}")
                 if description:
-                    print(f"   Description: {description}")
+                    lines.append(f"   Description: {description}")
                 
                 # Show values if available
                 if 'valueString' in alert:
-                    print(f"   Value: {alert['valueString']}")
+                    lines.append(f"   Value: {alert['valueString']}")
         
-        print("="*60)
+        lines.append("="*60)
+        # Include the newline in the string so the block goes out in a single write
+        print("\n".join(lines) + "\n", end="")
         
         # Log to file for persistence
-        with open('logs/alerts.log', 'a') as f:
-            f.write(f"[{timestamp}] {json.dumps(alert_data)}\n")
+        line = b"[%b] %b\n" % (timestamp.encode('ascii'), json_dumps(alert_data))
+        with self.server.alerts_lock:
+            self.server.alerts_log.write(line)
     
     def log_message(self, format, *args):
         """Suppress default HTTP logging"""
         pass
 
-def start_webhook_server():
+def start_webhook_server(reuse_port=False):
     """Start the webhook server in a separate thread"""
-    server = HTTPServer(('localhost', 8080), AlertHandler)
-    print("🎯 Alert webhook server started on http://localhost:8080")
+    server_class = ReusePortHTTPServer if reuse_port else ThreadingHTTPServer
+    server = server_class(WEBHOOK_ADDRESS, AlertHandler)
+    # Keep the alerts log open for the server's lifetime; handlers share it under a lock.
+    # Each worker process opens its own O_APPEND handle, so their writes don't interleave.
+    server.alerts_log = open('logs/alerts.log', 'ab', buffering=0)
+    server.alerts_lock = threading.Lock()
+    print(f"🎯 Alert webhook server started on http://localhost:8080 (pid {os.getpid()})")
     print("   Ready to receive Grafana alerts at /alerts endpoint")
-    server.serve_forever()
+    try:
+        server.serve_forever()
+    finally:
+        server.alerts_log.close()
 
-if __name__ == "__main__":
-    import os
+def _address_in_use(address):
+    """Check whether something is already listening on the address"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            probe.bind(address)
+        except OSError:
+            return True
+    return False
+
+def _exit_on_sigterm(signum, frame):
+    """Turn SIGTERM into SystemExit so a worker closes its alerts log"""
+    raise SystemExit(0)
+
+def _stop_on_signal(signum, frame):
+    """Stop the parent on SIGINT or SIGTERM, even if SIGINT was inherited as ignored"""
+    raise KeyboardInterrupt
+
+def run_workers(workers):
+    """Serve from several processes sharing the port via SO_REUSEPORT (Linux only)"""
+    # SO_REUSEPORT would silently share the port with an already running copy
+    if _address_in_use(WEBHOOK_ADDRESS):
+        raise OSError(f"{WEBHOOK_ADDRESS[0]}:{WEBHOOK_ADDRESS[1]} is already in use")
+    
+    # Flush before forking so buffered output isn't repeated by every worker
+    sys.stdout.flush()
+    children = []
+    for _ in range(workers - 1):
+        pid = os.fork()
+        if pid == 0:
+            # Workers are stopped by the parent rather than by the terminal's Ctrl+C
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, _exit_on_sigterm)
+            exit_code = 0
+            try:
+                start_webhook_server(reuse_port=True)
+            except SystemExit:
+                pass
+            except BaseException:
+                traceback.print_exc()
+                exit_code = 1
+            finally:
+                sys.stdout.flush()
+                os._exit(exit_code)
+        children.append(pid)
     
+    signal.signal(signal.SIGINT, _stop_on_signal)
+    signal.signal(signal.SIGTERM, _stop_on_signal)
+    try:
+        start_webhook_server(reuse_port=True)
+    finally:
+        # Forward the shutdown to the workers and wait for them to exit
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            os.waitpid(pid, 0)
+
+if __name__ == "__main__":
     # Ensure logs directory exists
     os.makedirs('logs', exist_ok=True)
     
@@ -94,7 +201,22 @@ if __name__ == "__main__":
     print("This will receive and display alerts from Grafana")
     print("Press Ctrl+C to stop")
     
+    # Number of server processes; only Linux load-balances SO_REUSEPORT sockets
     try:
-        start_webhook_server()
+        workers = int(os.environ.get("WEBHOOK_WORKERS", "1"))
+        if workers < 1:
+            raise ValueError
+    except ValueError:
+        print(f"⚠️  Invalid WEBHOOK_WORKERS={os.environ['WEBHOOK_WORKERS']!r}, using 1 worker")
+        workers = 1
+    if workers > 1 and not sys.platform.startswith("linux"):
+        print("⚠️  Multiple workers are only supported on Linux, using 1 worker")
+        workers = 1
+    
+    try:
+        if workers > 1:
+            run_workers(workers)
+        else:
+            start_webhook_server()
     except KeyboardInterrupt:
         print("\nAlert webhook server stopped.")
@@ -0,0 +1,95 @@
+"""
+Helpers shared by the log generator and the traffic simulator.
+"""
+
+import os
+import signal
+import time
+
+from influxdb_client.client.write_api import WriteOptions
+
+# Request attributes the generators draw from
+HTTP_METHODS = ["GET", "POST", "PUT", "DELETE", "PATCH"]
+API_ENDPOINTS = ["/login", "/api/v1/users", "/api/v1/products", "/logout", "/health"]
+STATUS_CODES = [200, 201, 202, 400, 401, 403, 404, 500, 503]
+
+# InfluxDB client settings
+INFLUXDB_POOL_SIZE = 25
+# Bound retries and the close() wait so shutdown doesn't hang when InfluxDB is down
+INFLUXDB_WRITE_OPTIONS = WriteOptions(batch_size=500, flush_interval=1000,
+                                      jitter_interval=200, retry_interval=5000,
+                                      max_retry_time=15_000, max_close_wait=20_000)
+
+# Print every log line to the console only when LOG_VERBOSE=1; otherwise print
+# at most one line per PRINT_INTERVAL seconds
+VERBOSE = os.environ.get("LOG_VERBOSE", "0") == "1"
+PRINT_INTERVAL = 1.0
+
+
+def escape_tag(value):
+    """Escape a tag value for InfluxDB line protocol."""
+    return value.replace("\\", "\\\\").replace(",", "\\,").replace("=", "\\=").replace(" ", "\\ ")
+
+
+# Methods and endpoints are closed sets, so build their line protocol tags once up front
+METHOD_TAGS = {m: f"method={escape_tag(m)}" for m in HTTP_METHODS}
+API_TAGS = {api: f"api={escape_tag(api)}" for api in API_ENDPOINTS}
+
+
+# The "YYYY-MM-DDTHH:MM:SS" prefix only changes once per second, so cache it
+_iso_cached_second = None
+_iso_cached_prefix = ""
+
+
+def iso_now_ns():
+    """Return the current UTC time as (ISO 8601 string, integer nanoseconds)."""
+    global _iso_cached_second, _iso_cached_prefix
+    ns = time.time_ns()
+    second = ns // 1_000_000_000
+    if second != _iso_cached_second:
+        _iso_cached_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        _iso_cached_second = second
+    return f"{_iso_cached_prefix}.{ns // 1000 % 1_000_000:06d}+00:00", ns
+
+
+# Request ids are drawn from a pool of random bytes refilled with one os.urandom call
+_UUID_POOL_COUNT = 1024
+_uuid_pool = b""
+_uuid_pool_idx = 0
+
+
+def next_uuid_hex():
+    """Return 32 random hex characters to use as a request id."""
+    global _uuid_pool, _uuid_pool_idx
+    if _uuid_pool_idx >= len(_uuid_pool):
+        _uuid_pool = os.urandom(16 * _UUID_POOL_COUNT)
+        _uuid_pool_idx = 0
+    i = _uuid_pool_idx
+    _uuid_pool_idx = i + 16
+    return _uuid_pool[i:i + 16].hex()
+
+
+class InfluxWriteStatus:
+    """Tracks whether the last background batch write to InfluxDB succeeded.
+
+    Pass ``on_success`` and ``on_error`` as the write_api callbacks; the client
+    already logs failed batches, so these only record the outcome.
+    """
+
+    def __init__(self):
+        self.ok = True
+
+    def on_success(self, conf, data):
+        self.ok = True
+
+    def on_error(self, conf, data, exception):
+        self.ok = False
+
+
+def _exit_on_sigterm(signum, frame):
+    raise SystemExit(0)
+
+
+def exit_on_sigterm():
+    """Turn SIGTERM into SystemExit so cleanup (file flushes, write_api.close) still runs."""
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
@@ -1,20 +1,31 @@
 import random
-import datetime
-import uuid
 import time
 import os
-import json
-from influxdb_client import InfluxDBClient, Point, WritePrecision
-from influxdb_client.client.write_api import SYNCHRONOUS
+from influxdb_client import InfluxDBClient, WritePrecision
 
-# --- Configuration ---
-HTTP_METHODS = ["GET", "POST", "PUT", "DELETE", "PATCH"]
-API_ENDPOINTS = ["/login", "/api/v1/users", "/api/v1/products", "/logout", "/health"]
-STATUS_CODES = [200, 201, 202, 400, 401, 403, 404, 500, 503]
+from log_common import (
+    API_ENDPOINTS, API_TAGS, HTTP_METHODS, INFLUXDB_POOL_SIZE, INFLUXDB_WRITE_OPTIONS, METHOD_TAGS,
+    PRINT_INTERVAL, STATUS_CODES, VERBOSE, InfluxWriteStatus, exit_on_sigterm, iso_now_ns, next_uuid_hex,
+)
+
+# orjson is much faster than the stdlib encoder; fall back to json if it isn't installed
+try:
+    import orjson
+
+    json_dumps = orjson.dumps
+except ImportError:
+    import json
 
+    def json_dumps(obj):
+        return json.dumps(obj).encode("utf-8")
+
+# --- Configuration ---
 LOG_DIR = "logs"
 RAW_LOG_FILE = os.path.join(LOG_DIR, "output.log")
 JSON_LOG_FILE = os.path.join(LOG_DIR, "output.json.log")
+LOG_BUFFER_SIZE = 64 * 1024
+FLUSH_INTERVAL = 1.0  # seconds between log file flushes
+SLEEP_POOL_SIZE = 4096  # must be a power of two
 
 # InfluxDB Configuration
 INFLUXDB_URL = "http://localhost:8086"
@@ -22,6 +33,24 @@ INFLUXDB_TOKEN = "my-super-secret-token"
 INFLUXDB_ORG = "my-org"
 INFLUXDB_BUCKET = "my-bucket"
 
+# Local bindings for the per-entry hot path
+_rand = random.random
+_randint = random.randint
+_N_METHODS = len(HTTP_METHODS)
+_N_ENDPOINTS = len(API_ENDPOINTS)
+_N_STATUS_CODES = len(STATUS_CODES)
+
+# Precomputed sleep intervals between log entries
+_SLEEP_INTERVALS = [random.uniform(0.5, 3.0) for _ in range(SLEEP_POOL_SIZE)]
+
+# Methods, endpoints and status codes are closed sets, so build each
+# "key=value" segment of the raw log and line protocol records once up front
+_METHOD_SEGMENTS = {m: f"method={m}".encode("ascii") for m in HTTP_METHODS}
+_API_SEGMENTS = {api: f"api={api}".encode("ascii") for api in API_ENDPOINTS}
+_STATUS_SEGMENTS = {s: f"status={s}".encode("ascii") for s in STATUS_CODES}
+
+_STATUS_TAGS = {s: f"status_code={s}" for s in STATUS_CODES}
+
 # Ensure the log directory exists
 os.makedirs(LOG_DIR, exist_ok=True)
 
@@ -29,16 +58,16 @@ def generate_log_entry():
     """
     Generates a single, randomized log entry as a dictionary.
     """
-    timestamp = datetime.datetime.now(datetime.timezone.utc)
-    request_id = str(uuid.uuid4())
-    method = random.choice(HTTP_METHODS)
-    api = random.choice(API_ENDPOINTS)
-    status = random.choice(STATUS_CODES)
-    latency = random.randint(10, 2000)
+    timestamp, timestamp_ns = iso_now_ns()
+    request_id = next_uuid_hex()
+    method = HTTP_METHODS[int(_rand() * _N_METHODS)]
+    api = API_ENDPOINTS[int(_rand() * _N_ENDPOINTS)]
+    status = STATUS_CODES[int(_rand() * _N_STATUS_CODES)]
+    latency = _randint(10, 2000)
 
     log_entry = {
-        "timestamp": timestamp.isoformat(),
-        "timestamp_dt": timestamp,  # Keep datetime object for InfluxDB
+        "timestamp": timestamp,
+        "timestamp_ns": timestamp_ns,  # Keep integer nanoseconds for InfluxDB
         "request_id": request_id,
         "method": method,
         "api": api,
@@ -47,81 +76,106 @@ def generate_log_entry():
     }
     return log_entry
 
-def write_to_influxdb(client, log_data):
+def write_to_influxdb(write_api, log_data):
     """
-    Writes log data to InfluxDB.
+    Queues log data for a batched write to InfluxDB.
     """
     try:
-        # Create a Point for InfluxDB
-        point = Point("api_logs") \
-            .tag("method", log_data["method"]) \
-            .tag("api", log_data["api"]) \
-            .tag("status_code", str(log_data["status"])) \
-            .field("latency_ms", log_data["latency_ms"]) \
-            .field("request_id", log_data["request_id"]) \
-            .time(log_data["timestamp_dt"], WritePrecision.NS)
-        
-        # Write the point to InfluxDB
-        write_api = client.write_api(write_options=SYNCHRONOUS)
-        write_api.write(bucket=INFLUXDB_BUCKET, org=INFLUXDB_ORG, record=point)
+        # Build the line protocol record directly; the schema is fixed
+        line = (
+            f'api_logs,{METHOD_TAGS[log_data["method"]]},{API_TAGS[log_data["api"]]},'
+            f'{_STATUS_TAGS[log_data["status"]]} '
+            f'latency_ms={log_data["latency_ms"]}i,request_id="{log_data["request_id"]}" '
+            f'{log_data["timestamp_ns"]}'
+        )
+
+        # Hand the record to the batching writer
+        write_api.write(bucket=INFLUXDB_BUCKET, org=INFLUXDB_ORG, record=line,
+                        write_precision=WritePrecision.NS)
         return True
     except Exception as e:
         print(f"Error writing to InfluxDB: {e}")
         return False
 
 if __name__ == "__main__":
+    exit_on_sigterm()
+
     print("Log generator started... Press Ctrl+C to stop.")
     print(f"Connecting to InfluxDB at {INFLUXDB_URL}")
     
     # Initialize InfluxDB client
     influx_client = None
+    influx_write_api = None
+    influx_write_status = InfluxWriteStatus()
     try:
-        influx_client = InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG)
+        influx_client = InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG,
+                                       enable_gzip=True, connection_pool_maxsize=INFLUXDB_POOL_SIZE)
         # Test connection
-        influx_client.ping()
+        if not influx_client.ping():
+            raise ConnectionError(f"no response from {INFLUXDB_URL}")
+        influx_write_api = influx_client.write_api(write_options=INFLUXDB_WRITE_OPTIONS,
+                                                   success_callback=influx_write_status.on_success,
+                                                   error_callback=influx_write_status.on_error)
         print("✅ Successfully connected to InfluxDB!")
     except Exception as e:
         print(f"⚠️  Warning: Could not connect to InfluxDB: {e}")
         print("Continuing with file logging only...")
     
     try:
-        with open(RAW_LOG_FILE, "a") as raw_f, open(JSON_LOG_FILE, "a") as json_f:
+        with open(RAW_LOG_FILE, "ab", buffering=LOG_BUFFER_SIZE) as raw_f, \
+                open(JSON_LOG_FILE, "ab", buffering=LOG_BUFFER_SIZE) as json_f:
+            count = 0
+            last_flush = time.monotonic()
+            last_print = last_flush - PRINT_INTERVAL
             while True:
+                count += 1
+
                 # Generate the log data
                 log_data = generate_log_entry()
 
                 # --- 1. Create and write the raw text log ---
-                raw_log_line = (
-                    f"[{log_data['timestamp']}] request_id={log_data['request_id']} "
-                    f"method={log_data['method']} api={log_data['api']} "
-                    f"status={log_data['status']} latency={log_data['latency_ms']}ms"
+                raw_log_line = b"[%b] request_id=%b %b %b %b latency=%dms\n" % (
+                    log_data["timestamp"].encode("ascii"),
+                    log_data["request_id"].encode("ascii"),
+                    _METHOD_SEGMENTS[log_data["method"]],
+                    _API_SEGMENTS[log_data["api"]],
+                    _STATUS_SEGMENTS[log_data["status"]],
+                    log_data["latency_ms"],
                 )
-                raw_f.write(raw_log_line + "\n")
+                raw_f.write(raw_log_line)
 
                 # --- 2. Create and write the JSON log ---
-                # Remove timestamp_dt before JSON serialization
-                json_data = {k: v for k, v in log_data.items() if k != "timestamp_dt"}
-                json_log_line = json.dumps(json_data)
-                json_f.write(json_log_line + "\n")
+                # Remove timestamp_ns before JSON serialization
+                json_data = {k: v for k, v in log_data.items() if k != "timestamp_ns"}
+                json_f.write(json_dumps(json_data) + b"\n")
 
                 # --- 3. Write to InfluxDB ---
                 influx_success = False
-                if influx_client:
-                    influx_success = write_to_influxdb(influx_client, log_data)
+                if influx_write_api:
+                    # Points are sent in background batches, so also check how the last batch went
+                    influx_success = write_to_influxdb(influx_write_api, log_data) and influx_write_status.ok
                 
                 # Print to console with status indicators
-                status_indicator = "📊" if influx_success else "📝"
-                print(f"{status_indicator} {raw_log_line}")
+                now = time.monotonic()
+                if VERBOSE or now - last_print >= PRINT_INTERVAL:
+                    status_indicator = "📊" if influx_success else "📝"
+                    print(f"{status_indicator} {raw_log_line.decode('ascii').rstrip()}")
+                    last_print = now
                 
-                # Flush files
-                raw_f.flush()
-                json_f.flush()
+                # Flush files on a timer rather than on every line
+                if now - last_flush >= FLUSH_INTERVAL:
+                    raw_f.flush()
+                    json_f.flush()
+                    last_flush = now
 
                 # Wait for a random interval before the next log
-                time.sleep(random.uniform(0.5, 3.0))
+                time.sleep(_SLEEP_INTERVALS[count & (SLEEP_POOL_SIZE - 1)])
 
     except KeyboardInterrupt:
         print("\nLog generator stopped.")
     finally:
+        if influx_write_api:
+            # Flush any points still waiting in the batch
+            influx_write_api.close()
         if influx_client:
             influx_client.close()
\ No newline at end of file
@@ -5,19 +5,16 @@ Simulates various scenarios like traffic spikes, outages, and slow responses.
 """
 
 import random
-import datetime
-import uuid
 import time
 import os
 import json
 import threading
-from influxdb_client import InfluxDBClient, Point, WritePrecision
-from influxdb_client.client.write_api import SYNCHRONOUS
+from influxdb_client import InfluxDBClient, WritePrecision
 
-# Configuration
-HTTP_METHODS = ["GET", "POST", "PUT", "DELETE", "PATCH"]
-API_ENDPOINTS = ["/login", "/api/v1/users", "/api/v1/products", "/logout", "/health"]
-STATUS_CODES = [200, 201, 202, 400, 401, 403, 404, 500, 503]
+from log_common import (
+    API_ENDPOINTS, API_TAGS, HTTP_METHODS, INFLUXDB_POOL_SIZE, INFLUXDB_WRITE_OPTIONS, METHOD_TAGS,
+    PRINT_INTERVAL, STATUS_CODES, VERBOSE, InfluxWriteStatus, exit_on_sigterm, iso_now_ns, next_uuid_hex,
+)
 
 # InfluxDB Configuration
 INFLUXDB_URL = "http://localhost:8086"
@@ -25,6 +22,10 @@ INFLUXDB_TOKEN = "my-super-secret-token"
 INFLUXDB_ORG = "my-org"
 INFLUXDB_BUCKET = "my-bucket"
 
+# Size of the precomputed random pools (must be a power of two)
+INTERVAL_POOL_SIZE = 4096
+VALUE_POOL_SIZE = 8192
+
 # Simulation modes
 class TrafficPattern:
     NORMAL = "normal"
@@ -33,26 +34,71 @@ class TrafficPattern:
     SLOW_RESPONSE = "slow_response"
     HIGH_ERROR_RATE = "high_error_rate"
 
+# Status code distribution and latency range (ms) for each traffic pattern
+PATTERN_PROFILES = {
+    TrafficPattern.NORMAL: (STATUS_CODES, [30, 10, 10, 5, 3, 2, 2, 3, 1], (50, 500)),
+    # More traffic, slightly higher latency
+    TrafficPattern.SPIKE: (STATUS_CODES, [25, 8, 8, 8, 5, 3, 3, 5, 2], (100, 800)),
+    # High error rates, service unavailable, very slow
+    TrafficPattern.OUTAGE: ([500, 503, 504], [1, 2, 1], (5000, 10000)),
+    # Normal status codes but high latency
+    TrafficPattern.SLOW_RESPONSE: (STATUS_CODES, [30, 10, 10, 5, 3, 2, 2, 3, 1], (1500, 3000)),
+    # High proportion of 4xx and 5xx errors
+    TrafficPattern.HIGH_ERROR_RATE: (STATUS_CODES, [10, 3, 3, 15, 10, 8, 8, 15, 10], (50, 500)),
+}
+
+# Every status code any pattern can produce, as a prebuilt line protocol tag
+_STATUS_TAGS = {s: f"status_code={s}"
+                for codes, _, _ in PATTERN_PROFILES.values() for s in codes}
+
 class TrafficSimulator:
+    # Console prefix shown for each traffic pattern
+    PATTERN_INDICATORS = {
+        TrafficPattern.NORMAL: "📊",
+        TrafficPattern.SPIKE: "🔥",
+        TrafficPattern.OUTAGE: "💥",
+        TrafficPattern.SLOW_RESPONSE: "🐌",
+        TrafficPattern.HIGH_ERROR_RATE: "⚠️"
+    }
+
     def __init__(self):
         self.influx_client = None
+        self.write_api = None
+        self.write_status = InfluxWriteStatus()
         self.current_pattern = TrafficPattern.NORMAL
-        self.pattern_start_time = time.time()
+        self.pattern_start_time = time.monotonic()
         self.pattern_duration = 0
         self.base_request_rate = 1.0  # requests per second
+
+        # Precompute jittered request intervals so the loop only does an index lookup
+        base_interval = 1.0 / self.base_request_rate
+        self._interval_pool = [base_interval + random.uniform(-0.3, 0.3)
+                               for _ in range(INTERVAL_POOL_SIZE)]
+        self._interval_idx = 0
+
+        # Pre-sampled status codes and latencies per pattern; each pool is drawn
+        # on first use and redrawn only when that pattern has used it up
+        self._status_pool = {}
+        self._latency_pool = {}
+        self._pool_idx = dict.fromkeys(PATTERN_PROFILES, VALUE_POOL_SIZE)
         
         # Initialize InfluxDB connection
         try:
-            self.influx_client = InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG)
-            self.influx_client.ping()
+            self.influx_client = InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG,
+                                                enable_gzip=True, connection_pool_maxsize=INFLUXDB_POOL_SIZE)
+            if not self.influx_client.ping():
+                raise ConnectionError(f"no response from {INFLUXDB_URL}")
+            self.write_api = self.influx_client.write_api(write_options=INFLUXDB_WRITE_OPTIONS,
+                                                          success_callback=self.write_status.on_success,
+                                                          error_callback=self.write_status.on_error)
             print("✅ Connected to InfluxDB")
         except Exception as e:
             print(f"⚠️  Warning: Could not connect to InfluxDB: {e}")
     
     def generate_log_entry(self):
         """Generate a log entry based on current traffic pattern"""
-        timestamp = datetime.datetime.now(datetime.timezone.utc)
-        request_id = str(uuid.uuid4())
+        timestamp, timestamp_ns = iso_now_ns()
+        request_id = next_uuid_hex()
         method = random.choice(HTTP_METHODS)
         api = random.choice(API_ENDPOINTS)
         
@@ -60,8 +106,8 @@ class TrafficSimulator:
         status, latency = self._get_pattern_specific_values()
         
         return {
-            "timestamp": timestamp.isoformat(),
-            "timestamp_dt": timestamp,
+            "timestamp": timestamp,
+            "timestamp_ns": timestamp_ns,
             "request_id": request_id,
             "method": method,
             "api": api,
@@ -69,33 +115,22 @@ class TrafficSimulator:
             "latency_ms": latency
         }
     
+    def _fill_value_pool(self, pattern):
+        """Sample a fresh batch of status codes and latencies for one pattern"""
+        codes, weights, (low, high) = PATTERN_PROFILES[pattern]
+        self._status_pool[pattern] = random.choices(codes, weights=weights, k=VALUE_POOL_SIZE)
+        self._latency_pool[pattern] = random.choices(range(low, high + 1), k=VALUE_POOL_SIZE)
+        self._pool_idx[pattern] = 0
+
     def _get_pattern_specific_values(self):
         """Get status and latency based on current traffic pattern"""
-        if self.current_pattern == TrafficPattern.NORMAL:
-            status = random.choices(STATUS_CODES, weights=[30, 10, 10, 5, 3, 2, 2, 3, 1])[0]
-            latency = random.randint(50, 500)
-            
-        elif self.current_pattern == TrafficPattern.SPIKE:
-            # More traffic, slightly higher latency
-            status = random.choices(STATUS_CODES, weights=[25, 8, 8, 8, 5, 3, 3, 5, 2])[0]
-            latency = random.randint(100, 800)
-            
-        elif self.current_pattern == TrafficPattern.OUTAGE:
-            # High error rates, service unavailable
-            status = random.choices([500, 503, 504], weights=[1, 2, 1])[0]
-            latency = random.randint(5000, 10000)  # Very slow
-            
-        elif self.current_pattern == TrafficPattern.SLOW_RESPONSE:
-            # Normal status codes but high latency
-            status = random.choices(STATUS_CODES, weights=[30, 10, 10, 5, 3, 2, 2, 3, 1])[0]
-            latency = random.randint(1500, 3000)
-            
-        elif self.current_pattern == TrafficPattern.HIGH_ERROR_RATE:
-            # High proportion of 4xx and 5xx errors
-            status = random.choices(STATUS_CODES, weights=[10, 3, 3, 15, 10, 8, 8, 15, 10])[0]
-            latency = random.randint(50, 500)
-        
-        return status, latency
+        pattern = self.current_pattern
+        i = self._pool_idx[pattern]
+        if i == VALUE_POOL_SIZE:
+            self._fill_value_pool(pattern)
+            i = 0
+        self._pool_idx[pattern] = i + 1
+        return self._status_pool[pattern][i], self._latency_pool[pattern][i]
     
     def _get_request_interval(self):
         """Get request interval based on current pattern"""
@@ -106,12 +141,13 @@ class TrafficSimulator:
         elif self.current_pattern == TrafficPattern.OUTAGE:
             return base_interval * 2.0   # Slower during outage
         else:
-            return base_interval + random.uniform(-0.3, 0.3)
+            self._interval_idx += 1
+            return self._interval_pool[self._interval_idx & (INTERVAL_POOL_SIZE - 1)]
     
     def change_pattern(self, pattern, duration=60):
         """Change traffic pattern for a specified duration"""
         self.current_pattern = pattern
-        self.pattern_start_time = time.time()
+        self.pattern_start_time = time.monotonic()
         self.pattern_duration = duration
         
         pattern_emoji = {
@@ -127,7 +163,7 @@ class TrafficSimulator:
     
     def update_pattern(self):
         """Update pattern based on time and randomness"""
-        current_time = time.time()
+        current_time = time.monotonic()
         
         # Check if current pattern should expire
         if (self.pattern_duration > 0 and 
@@ -150,22 +186,20 @@ class TrafficSimulator:
             self.change_pattern(pattern, duration)
     
     def write_to_influxdb(self, log_data):
-        """Write log data to InfluxDB"""
-        if not self.influx_client:
+        """Queue log data for a batched write to InfluxDB"""
+        if not self.write_api:
             return False
         
         try:
-            point = Point("api_logs") \
-                .tag("method", log_data["method"]) \
-                .tag("api", log_data["api"]) \
-                .tag("status_code", str(log_data["status"])) \
-                .tag("traffic_pattern", self.current_pattern) \
-                .field("latency_ms", log_data["latency_ms"]) \
-                .field("request_id", log_data["request_id"]) \
-                .time(log_data["timestamp_dt"], WritePrecision.NS)
-            
-            write_api = self.influx_client.write_api(write_options=SYNCHRONOUS)
-            write_api.write(bucket=INFLUXDB_BUCKET, org=INFLUXDB_ORG, record=point)
+            line = (
+                f'api_logs,{METHOD_TAGS[log_data["method"]]},{API_TAGS[log_data["api"]]},'
+                f'{_STATUS_TAGS[log_data["status"]]},traffic_pattern={self.current_pattern} '
+                f'latency_ms={log_data["latency_ms"]}i,request_id="{log_data["request_id"]}" '
+                f'{log_data["timestamp_ns"]}'
+            )
+
+            self.write_api.write(bucket=INFLUXDB_BUCKET, org=INFLUXDB_ORG, record=line,
+                                 write_precision=WritePrecision.NS)
             return True
         except Exception as e:
             print(f"Error writing to InfluxDB: {e}")
@@ -178,30 +212,27 @@ class TrafficSimulator:
         print("   - Press Ctrl+C to stop")
         
         try:
+            last_print = time.monotonic() - PRINT_INTERVAL
             while True:
                 # Update traffic pattern
                 self.update_pattern()
                 
                 # Generate and send log entry
                 log_data = self.generate_log_entry()
-                influx_success = self.write_to_influxdb(log_data)
+                # Points are sent in background batches, so also check how the last batch went
+                influx_success = self.write_to_influxdb(log_data) and self.write_status.ok
                 
                 # Display log with pattern indicator
-                pattern_indicators = {
-                    TrafficPattern.NORMAL: "📊",
-                    TrafficPattern.SPIKE: "🔥", 
-                    TrafficPattern.OUTAGE: "💥",
-                    TrafficPattern.SLOW_RESPONSE: "🐌",
-                    TrafficPattern.HIGH_ERROR_RATE: "⚠️"
-                }
-                
-                indicator = pattern_indicators.get(self.current_pattern, "📊")
-                status_indicator = "✅" if influx_success else "❌"
-                
-                print(f"{indicator}{status_indicator} [{log_data['timestamp']}] "
-                      f"method={log_data['method']} api={log_data['api']} "
-                      f"status={log_data['status']} latency={log_data['latency_ms']}ms "
-                      f"pattern={self.current_pattern}")
+                now = time.monotonic()
+                if VERBOSE or now - last_print >= PRINT_INTERVAL:
+                    last_print = now
+                    indicator = self.PATTERN_INDICATORS.get(self.current_pattern, "📊")
+                    status_indicator = "✅" if influx_success else "❌"
+
+                    print(f"{indicator}{status_indicator} [{log_data['timestamp']}] "
+                          f"method={log_data['method']} api={log_data['api']} "
+                          f"status={log_data['status']} latency={log_data['latency_ms']}ms "
+                          f"pattern={self.current_pattern}")
                 
                 # Wait for next request
                 time.sleep(self._get_request_interval())
@@ -209,9 +240,14 @@ class TrafficSimulator:
         except KeyboardInterrupt:
             print("\n🛑 Traffic simulator stopped")
         finally:
+            if self.write_api:
+                # Flush any points still waiting in the batch
+                self.write_api.close()
             if self.influx_client:
                 self.influx_client.close()
 
 if __name__ == "__main__":
+    # SIGTERM must unwind run() so queued InfluxDB points are flushed
+    exit_on_sigterm()
     simulator = TrafficSimulator()
     simulator.run()